@@ -1,13 +1,813 @@
 import tkinter as tk
-from tkinter import colorchooser, ttk, filedialog, messagebox
+from tkinter import colorchooser, ttk, filedialog, messagebox, simpledialog
 import json
+import array
+import mmap
+import re
+import struct
+import sys
+import zlib
+import itertools
 import collections  # Used for the deque in Flood Fill
 
 # --- Configuration ---
 CANVAS_SIZE = 600
-PIXEL_GRID_SIZE = 30
-PIXEL_SIZE = CANVAS_SIZE // PIXEL_GRID_SIZE
+PIXEL_GRID_SIZE = 30  # Cells per side of a new document
+MAX_GRID_SIZE = 8192
 ERASER_COLOR = "#FFFFFF"
+GRID_COLOR = "#E0E0E0"
+
+# --- Viewport ---
+TILE_SIZE = 256  # Maximum tile side in canvas pixels
+TILE_CACHE_SIZE = 256  # Rendered tiles kept across pans and zoom levels
+MAX_ZOOM = 64  # Canvas pixels per cell when zoomed in
+MAX_SUBSAMPLE = 16  # Cells per canvas pixel when zoomed out
+GRID_MIN_ZOOM = 4  # Grid lines are hidden below this many pixels per cell
+UNDO_MEMORY_BUDGET = 8 * 1024 * 1024  # Bytes of delta data kept for undo/redo
+
+# --- Project File Formats ---
+JSON_FORMAT_NAME = "pixel-art-studio"
+BINARY_MAGIC = b"PXAS"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBII")  # magic, version, width, height
+STREAM_CHUNK = 64 * 1024
+COLOR_PATTERN = re.compile(r"#[0-9A-Fa-f]{6}")
+
+
+class PixelDocument:
+    """
+    Stores the artwork as a flat plane of palette indices.
+    Index 0 is always the empty (eraser) color, so a blank document is all zeros.
+    """
+
+    def __init__(self, width, height, pixels=None):
+        self.width = width
+        self.height = height
+        self.palette = [ERASER_COLOR]
+        self.palette_lookup = {ERASER_COLOR: 0}
+        if pixels is None:
+            pixels = array.array("H", [0]) * (width * height)
+        self.pixels = pixels
+
+    def color_index(self, color):
+        """Returns the palette index of a color, adding it to the palette if new."""
+        index = self.palette_lookup.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self.palette_lookup[color] = index
+        return index
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_color(self, x, y):
+        return self.palette[self.pixels[y * self.width + x]]
+
+    def clear(self):
+        self.pixels = array.array("H", [0]) * (self.width * self.height)
+
+
+# --- Project Persistence ---
+# JSON is for interchange; the binary format (.pxa) is the fast native one:
+#   header | palette count (u16) | palette entries (u8 length + ASCII)
+#   | compressed size (u32) | zlib-compressed little-endian u16 index plane
+
+
+def save_json(document, path):
+    data = {
+        "format": JSON_FORMAT_NAME,
+        "version": 1,
+        "width": document.width,
+        "height": document.height,
+        "palette": document.palette,
+        "pixels": document.pixels.tolist(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict) or data.get("format") != JSON_FORMAT_NAME:
+        raise ValueError("Not a Pixel Art Studio project")
+    width, height = data.get("width"), data.get("height")
+    check_size(width, height)
+    pixels = data.get("pixels")
+    if not isinstance(pixels, list) or len(pixels) != width * height:
+        raise ValueError("Pixel data does not match the document size")
+    try:
+        pixels = array.array("H", pixels)
+    except (OverflowError, TypeError):
+        raise ValueError("Pixel data must be palette indices") from None
+
+    document = PixelDocument(width, height, pixels)
+    set_palette(document, data.get("palette"))
+    if max(pixels, default=0) >= len(document.palette):
+        raise ValueError("Pixel data references a missing palette entry")
+    return document
+
+
+def save_binary(document, path):
+    pixels = document.pixels
+    if sys.byteorder != "little":
+        pixels = array.array("H", pixels)
+        pixels.byteswap()
+    compressed = zlib.compress(pixels.tobytes(), 6)
+
+    with open(path, "wb") as f:
+        f.write(
+            BINARY_HEADER.pack(
+                BINARY_MAGIC, BINARY_VERSION, document.width, document.height
+            )
+        )
+        f.write(struct.pack("<H", len(document.palette)))
+        for color in document.palette:
+            encoded = color.encode("ascii")
+            f.write(struct.pack("<B", len(encoded)) + encoded)
+        f.write(struct.pack("<I", len(compressed)))
+        f.write(compressed)
+
+
+def load_binary(path):
+    """
+    Loads a .pxa project by memory mapping it and inflating the index plane
+    chunk by chunk straight into the document's pixel buffer.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            magic, version, width, height = BINARY_HEADER.unpack_from(mm, 0)
+            pos = BINARY_HEADER.size
+            if magic != BINARY_MAGIC or version != BINARY_VERSION:
+                raise ValueError("Not a Pixel Art Studio project")
+            check_size(width, height)
+
+            (count,) = struct.unpack_from("<H", mm, pos)
+            pos += 2
+            palette = []
+            for _ in range(count):
+                length = mm[pos]
+                palette.append(mm[pos + 1 : pos + 1 + length].decode("ascii"))
+                pos += 1 + length
+            (compressed_size,) = struct.unpack_from("<I", mm, pos)
+            pos += 4
+        except (struct.error, IndexError):
+            raise ValueError("Project file is truncated") from None
+
+        # The only full-size allocation: chunks are inflated into its buffer
+        pixels = array.array("H", [0]) * (width * height)
+        plane = memoryview(pixels).cast("B")
+        filled = 0
+        inflater = zlib.decompressobj()
+        end = min(pos + compressed_size, len(mm))
+        try:
+            while not inflater.eof:
+                data = inflater.unconsumed_tail
+                if not data and pos < end:
+                    data = mm[pos : min(pos + STREAM_CHUNK, end)]
+                    pos += len(data)
+                # Output is capped per call too, so it never holds a second plane
+                chunk = inflater.decompress(data, STREAM_CHUNK)
+                if not chunk and not data:
+                    break
+                if filled + len(chunk) > len(plane):
+                    raise ValueError("Pixel data does not match the document size")
+                plane[filled : filled + len(chunk)] = chunk
+                filled += len(chunk)
+        except zlib.error as e:
+            raise ValueError(f"Pixel data is corrupt ({e})") from None
+        if filled != len(plane) or not inflater.eof:
+            raise ValueError("Pixel data does not match the document size")
+
+    document = PixelDocument(width, height, pixels)
+    set_palette(document, palette)
+    check_indices(plane, len(palette))
+    plane.release()
+    if sys.byteorder != "little":
+        pixels.byteswap()
+    return document
+
+
+def check_size(width, height):
+    for value in (width, height):
+        if type(value) is not int or not 1 <= value <= MAX_GRID_SIZE:
+            raise ValueError(f"Document size must be 1 to {MAX_GRID_SIZE} cells")
+
+
+def check_indices(plane, count):
+    """
+    Raises ValueError if a little-endian uint16 index plane refers past the
+    end of a palette with count entries. Works on byte slices so the pixels
+    are never unpacked into Python ints.
+    """
+    top_high, top_low = divmod(count - 1, 256)
+    valid_high = bytes(range(top_high + 1))
+    valid_low = bytes(range(top_low + 1))
+
+    for start in range(0, len(plane), STREAM_CHUNK):
+        data = bytes(plane[start : start + STREAM_CHUNK])
+        high = data[1::2]
+        if high.translate(None, valid_high):
+            raise ValueError("Pixel data references a missing palette entry")
+        if top_low == 255:
+            continue
+        if top_high == 0:
+            if data[0::2].translate(None, valid_low):
+                raise ValueError("Pixel data references a missing palette entry")
+            continue
+        # Only cells in the palette's last block of 256 need their low byte checked
+        i = high.find(top_high)
+        while i != -1:
+            if data[2 * i] > top_low:
+                raise ValueError("Pixel data references a missing palette entry")
+            i = high.find(top_high, i + 1)
+
+
+def set_palette(document, palette):
+    if not isinstance(palette, list) or not palette or palette[0] != ERASER_COLOR:
+        raise ValueError("Palette must start with the eraser color")
+    for color in palette:
+        if not isinstance(color, str) or not COLOR_PATTERN.fullmatch(color):
+            raise ValueError(f"Invalid palette color: {color!r}")
+    lookup = {color: i for i, color in enumerate(palette)}
+    if len(lookup) != len(palette):
+        raise ValueError("Palette contains duplicate colors")
+    document.palette = list(palette)
+    document.palette_lookup = lookup
+
+
+class PixelDelta:
+    """
+    The cells changed by one action, run-length encoded.
+    Each run covers consecutive cell offsets that shared the same old value
+    and received the same new value, so a flood fill or clear collapses to
+    a handful of runs instead of one entry per cell. Runs are stored as they
+    are recorded; each cell may appear in at most one run.
+    """
+
+    __slots__ = (
+        "width", "starts", "lengths", "old_values", "new_values", "bounds"
+    )
+
+    def __init__(self, width):
+        self.width = width
+        self.starts = array.array("I")
+        self.lengths = array.array("I")
+        self.old_values = array.array("H")
+        self.new_values = array.array("H")
+        # Bounding box of the change in grid cells, used to limit the redraw
+        self.bounds = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, length, old, new):
+        """Records cells [start, start + length) changing from old to new."""
+        self._append_run(start, length, old, new)
+
+        width = self.width
+        y0, y1 = start // width, (start + length - 1) // width + 1
+        if y1 - y0 > 1:
+            self._extend_bounds(0, y0, width, y1)
+        else:
+            x0 = start % width
+            self._extend_bounds(x0, y0, x0 + length, y1)
+
+    def add_plane(self, pixels, new):
+        """Records every cell of pixels that is not already new."""
+        width = self.width
+        unchanged_row = array.array("H", [new]) * width
+        for row_start in range(0, len(pixels), width):
+            row = pixels[row_start : row_start + width]
+            if row == unchanged_row:
+                continue
+            x = 0
+            first_x = last_x = None
+            for old, group in itertools.groupby(row):
+                length = len(list(group))
+                if old != new:
+                    self._append_run(row_start + x, length, old, new)
+                    if first_x is None:
+                        first_x = x
+                    last_x = x + length
+                x += length
+            y = row_start // width
+            self._extend_bounds(first_x, y, last_x, y + 1)
+
+    def _append_run(self, start, length, old, new):
+        if (
+            self.starts
+            and self.starts[-1] + self.lengths[-1] == start
+            and self.old_values[-1] == old
+            and self.new_values[-1] == new
+        ):
+            self.lengths[-1] += length
+        else:
+            self.starts.append(start)
+            self.lengths.append(length)
+            self.old_values.append(old)
+            self.new_values.append(new)
+
+    def _extend_bounds(self, x0, y0, x1, y1):
+        if self.bounds is None:
+            self.bounds = (x0, y0, x1, y1)
+        else:
+            bx0, by0, bx1, by1 = self.bounds
+            self.bounds = (min(bx0, x0), min(by0, y0), max(bx1, x1), max(by1, y1))
+
+    def apply(self, pixels, forward=True):
+        """Writes the new (forward) or old (backward) values into pixels."""
+        values = self.new_values if forward else self.old_values
+        for start, length, value in zip(self.starts, self.lengths, values):
+            pixels[start : start + length] = array.array("H", [value]) * length
+
+    @property
+    def nbytes(self):
+        return sum(
+            len(a) * a.itemsize
+            for a in (self.starts, self.lengths, self.old_values, self.new_values)
+        )
+
+
+class UndoHistory:
+    """
+    Undo/redo stacks of PixelDeltas with a memory budget.
+    Changes are collected into a PixelDelta between begin() and commit();
+    the oldest entries are dropped once the stored deltas exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes=UNDO_MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self.undo_stack = collections.deque()
+        self.redo_stack = []
+        self.total_bytes = 0
+        self.pending = None  # PixelDelta being recorded while an action is open
+
+    @property
+    def recording(self):
+        return self.pending is not None
+
+    def begin(self, width):
+        self.pending = PixelDelta(width)
+
+    # The record methods do nothing when no action is open
+
+    def record(self, offset, old, new):
+        """Records one cell changing from old to new."""
+        self.record_run(offset, 1, old, new)
+
+    def record_run(self, start, length, old, new):
+        """Records cells [start, start + length) changing from old to new."""
+        if self.pending is not None:
+            self.pending.add(start, length, old, new)
+
+    def record_plane(self, pixels, new):
+        """Records every cell of pixels that is about to be set to new."""
+        if self.pending is not None:
+            self.pending.add_plane(pixels, new)
+
+    def commit(self):
+        """Closes the current action and pushes it if anything changed."""
+        delta = self.pending
+        self.pending = None
+        if not delta:
+            return
+
+        for undone in self.redo_stack:
+            self.total_bytes -= undone.nbytes
+        self.redo_stack.clear()
+
+        self.undo_stack.append(delta)
+        self.total_bytes += delta.nbytes
+        self.enforce_budget()
+
+    def enforce_budget(self):
+        # The most recent action is always kept, even if it alone is over budget
+        while self.total_bytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.total_bytes -= self.undo_stack.popleft().nbytes
+
+    def undo(self, pixels):
+        """Reverts the last action and returns its delta (or None)."""
+        if not self.undo_stack:
+            return None
+        delta = self.undo_stack.pop()
+        delta.apply(pixels, forward=False)
+        self.redo_stack.append(delta)
+        return delta
+
+    def redo(self, pixels):
+        """Re-applies the last undone action and returns its delta (or None)."""
+        if not self.redo_stack:
+            return None
+        delta = self.redo_stack.pop()
+        delta.apply(pixels, forward=True)
+        self.undo_stack.append(delta)
+        return delta
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.total_bytes = 0
+        self.pending = None
+
+
+def bresenham_line(x0, y0, x1, y1):
+    """Yields every grid cell on the line from (x0, y0) to (x1, y1), inclusive."""
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    error = dx + dy
+
+    while True:
+        yield x0, y0
+        if x0 == x1 and y0 == y1:
+            return
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x0 += step_x
+        if doubled <= dx:
+            error += dx
+            y0 += step_y
+
+
+class StrokeEngine:
+    """
+    Turns pointer samples into a gapless pencil stroke.
+    Successive samples are joined with Bresenham lines, cells already painted
+    in the stroke are skipped, and queued cells are painted in one batch per
+    frame. Tk is only reached through the schedule callback (after_idle in
+    the app), so strokes can be replayed headlessly.
+    """
+
+    def __init__(self, paint_cell, on_flush, schedule):
+        self.paint_cell = paint_cell  # (x, y) -> writes one cell
+        self.on_flush = on_flush  # called once after each batch
+        self.schedule = schedule  # runs a callback once the frame is idle
+        self.last_point = None
+        self.visited = set()
+        self.queue = []
+        self.flush_pending = False
+
+    def begin(self, x, y):
+        self.last_point = None
+        self.visited.clear()
+        self.queue.clear()
+        self.add_point(x, y)
+
+    def add_point(self, x, y):
+        if self.last_point is None:
+            cells = [(x, y)]
+        else:
+            cells = bresenham_line(*self.last_point, x, y)
+        self.last_point = (x, y)
+
+        for cell in cells:
+            if cell not in self.visited:
+                self.visited.add(cell)
+                self.queue.append(cell)
+
+        if self.queue and not self.flush_pending:
+            self.flush_pending = True
+            self.schedule(self.flush)
+
+    def flush(self):
+        """Paints all queued cells; safe to call when nothing is pending."""
+        self.flush_pending = False
+        if not self.queue:
+            return
+        for x, y in self.queue:
+            self.paint_cell(x, y)
+        self.queue.clear()
+        self.on_flush()
+
+    def end(self):
+        self.flush()
+        self.last_point = None
+        self.visited.clear()
+
+
+def tile_cells(zoom, subsample):
+    """Side length of a tile in cells at the given zoom level."""
+    if subsample > 1:
+        return TILE_SIZE * subsample
+    return max(1, TILE_SIZE // zoom)
+
+
+class Viewport:
+    """
+    Maps between grid cells and canvas pixels for the current pan and zoom.
+    A cell covers zoom / subsample canvas pixels, where at most one of the two
+    is above 1. view_x/view_y is the zoomed-space pixel at the canvas's
+    top-left corner.
+    """
+
+    def __init__(self, doc_width, doc_height, screen_width, screen_height):
+        self.doc_width = doc_width
+        self.doc_height = doc_height
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.fit()
+
+    def fit(self):
+        """
+        Picks the largest zoom level that shows the whole document, and the
+        ladder of levels zoom_at() steps through. The ladder is powers of two
+        plus the fitted level, so zooming in and out returns to the fit.
+        """
+        largest = max(self.doc_width, self.doc_height)
+        screen = min(self.screen_width, self.screen_height)
+        self.zoom = max(1, min(MAX_ZOOM, screen // largest))
+        self.subsample = 1
+        while largest > screen * self.subsample and self.subsample < MAX_SUBSAMPLE:
+            self.subsample *= 2
+        self.view_x = self.view_y = 0
+
+        levels = {(self.zoom, self.subsample)}
+        step = 1
+        while step <= max(MAX_ZOOM, MAX_SUBSAMPLE):
+            if step <= MAX_ZOOM:
+                levels.add((step, 1))
+            if step <= MAX_SUBSAMPLE:
+                levels.add((1, step))
+            step *= 2
+        self.levels = sorted(levels, key=lambda level: level[0] / level[1])
+
+    @property
+    def tile_cells(self):
+        return tile_cells(self.zoom, self.subsample)
+
+    def to_screen(self, cells):
+        return -(-cells * self.zoom // self.subsample)
+
+    def screen_to_cell(self, x, y):
+        return (
+            (x + self.view_x) * self.subsample // self.zoom,
+            (y + self.view_y) * self.subsample // self.zoom,
+        )
+
+    def clamp(self):
+        max_x = max(0, self.to_screen(self.doc_width) - self.screen_width)
+        max_y = max(0, self.to_screen(self.doc_height) - self.screen_height)
+        self.view_x = min(max(self.view_x, 0), max_x)
+        self.view_y = min(max(self.view_y, 0), max_y)
+
+    def pan(self, dx, dy):
+        self.view_x += dx
+        self.view_y += dy
+        self.clamp()
+
+    def zoom_at(self, x, y, zoom_in):
+        """Zooms one step, keeping the cell under (x, y) in place."""
+        anchor_x = (x + self.view_x) * self.subsample / self.zoom
+        anchor_y = (y + self.view_y) * self.subsample / self.zoom
+
+        index = self.levels.index((self.zoom, self.subsample))
+        index += 1 if zoom_in else -1
+        if not 0 <= index < len(self.levels):
+            return False
+        self.zoom, self.subsample = self.levels[index]
+
+        self.view_x = round(anchor_x * self.zoom / self.subsample - x)
+        self.view_y = round(anchor_y * self.zoom / self.subsample - y)
+        self.clamp()
+        return True
+
+    def visible_cells(self):
+        """Returns the (x0, y0, x1, y1) cell rectangle on screen, exclusive end."""
+        x0 = self.view_x * self.subsample // self.zoom
+        y0 = self.view_y * self.subsample // self.zoom
+        x1 = -(-(self.view_x + self.screen_width) * self.subsample // self.zoom)
+        y1 = -(-(self.view_y + self.screen_height) * self.subsample // self.zoom)
+        return x0, y0, min(x1, self.doc_width), min(y1, self.doc_height)
+
+    def visible_tiles(self):
+        cells = self.tile_cells
+        x0, y0, x1, y1 = self.visible_cells()
+        return [
+            (tx, ty)
+            for ty in range(y0 // cells, -(-y1 // cells))
+            for tx in range(x0 // cells, -(-x1 // cells))
+        ]
+
+
+class RasterRenderer:
+    """
+    Draws the document as a set of PhotoImage tiles seen through a Viewport.
+    Only tiles intersecting the visible area are placed on the canvas. Rendered
+    tiles are cached per zoom level with LRU eviction; an edit redraws the part
+    of each visible tile it touched and drops the stale tiles of other levels.
+    """
+
+    def __init__(self, canvas, document, viewport, show_grid=True):
+        self.canvas = canvas
+        self.document = document
+        self.viewport = viewport
+        self.show_grid = show_grid
+        self.dirty = None  # (x0, y0, x1, y1) in grid cells, exclusive end
+
+        self.tiles = collections.OrderedDict()  # (zoom, subsample, tx, ty) -> image
+        self.tile_items = {}  # key -> canvas item, for tiles currently on screen
+        # Cells are uploaded here at 1px each, then copied into a tile with -zoom
+        self.scratch = tk.PhotoImage(width=TILE_SIZE, height=TILE_SIZE)
+        # Per-renderer tag, so a replacement can be drawn before this is removed
+        self.grid_tag = f"grid-{id(self)}"
+        self.grid_key = None  # (zoom, subsample, x0, y0, x1, y1) of the drawn lines
+        self.grid_origin = (0, 0)  # View position the lines were drawn at
+
+    def tile_bounds(self, key):
+        zoom, subsample, tx, ty = key
+        cells = tile_cells(zoom, subsample)
+        x0, y0 = tx * cells, ty * cells
+        return (
+            x0,
+            y0,
+            min(x0 + cells, self.document.width),
+            min(y0 + cells, self.document.height),
+        )
+
+    def render(self):
+        """Places the tiles that intersect the viewport, rendering cache misses."""
+        vp = self.viewport
+        level = (vp.zoom, vp.subsample)
+        tile_px = vp.tile_cells * vp.zoom // vp.subsample
+
+        visible = set()
+        for tx, ty in vp.visible_tiles():
+            key = level + (tx, ty)
+            visible.add(key)
+            image = self.tiles.get(key)
+            if image is None:
+                image = self.render_tile(key)
+            self.tiles.move_to_end(key)
+
+            x = tx * tile_px - vp.view_x
+            y = ty * tile_px - vp.view_y
+            item = self.tile_items.get(key)
+            if item is None:
+                self.tile_items[key] = self.canvas.create_image(
+                    x, y, anchor="nw", image=image, tags="tile"
+                )
+            else:
+                self.canvas.coords(item, x, y)
+
+        for key in list(self.tile_items):
+            if key not in visible:
+                self.canvas.delete(self.tile_items.pop(key))
+
+        self.evict()
+        self.draw_grid()
+
+    def render_tile(self, key):
+        zoom, subsample = key[:2]
+        x0, y0, x1, y1 = self.tile_bounds(key)
+        image = tk.PhotoImage(
+            width=-(-(x1 - x0) // subsample) * zoom,
+            height=-(-(y1 - y0) // subsample) * zoom,
+        )
+        self.tiles[key] = image
+        self.paint_region(key, image, x0, y0, x1, y1)
+        return image
+
+    def paint_region(self, key, image, x0, y0, x1, y1):
+        """Draws cells [x0, x1) x [y0, y1) of a tile into its image."""
+        zoom, subsample = key[:2]
+        tile_x, tile_y = self.tile_bounds(key)[:2]
+
+        # When zoomed out, snap to the cells this level actually samples
+        x0 = tile_x + -(-(x0 - tile_x) // subsample) * subsample
+        y0 = tile_y + -(-(y0 - tile_y) // subsample) * subsample
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        doc = self.document
+        palette = doc.palette
+        rows = []
+        for y in range(y0, y1, subsample):
+            start = y * doc.width
+            row = doc.pixels[start + x0 : start + x1 : subsample]
+            rows.append("{" + " ".join([palette[i] for i in row]) + "}")
+        data = " ".join(rows)
+
+        dest_x = (x0 - tile_x) // subsample * zoom
+        dest_y = (y0 - tile_y) // subsample * zoom
+        if zoom == 1:
+            image.put(data, to=(dest_x, dest_y))
+        else:
+            self.scratch.put(data, to=(0, 0))
+            image.tk.call(
+                image, "copy", self.scratch,
+                "-from", 0, 0, len(row), len(rows),
+                "-to", dest_x, dest_y,
+                "-zoom", zoom, zoom,
+            )
+
+    def evict(self):
+        while len(self.tiles) > TILE_CACHE_SIZE:
+            key = next(iter(self.tiles))
+            if key in self.tile_items:
+                break  # Everything left is on screen
+            del self.tiles[key]
+
+    def draw_grid(self):
+        """
+        Draws grid lines for the visible cells plus a one-tile margin. Pans
+        that stay within the drawn cells just move the existing lines.
+        """
+        vp = self.viewport
+        x0, y0, x1, y1 = vp.visible_cells()
+        if self.grid_key is not None:
+            level, (gx0, gy0, gx1, gy1) = self.grid_key[:2], self.grid_key[2:]
+            if (
+                level == (vp.zoom, vp.subsample)
+                and gx0 <= x0 and gy0 <= y0 and x1 <= gx1 and y1 <= gy1
+            ):
+                origin_x, origin_y = self.grid_origin
+                self.canvas.move(
+                    self.grid_tag, origin_x - vp.view_x, origin_y - vp.view_y
+                )
+                # Tiles exposed by this pan were created above the lines
+                self.canvas.tag_raise(self.grid_tag)
+                self.grid_origin = (vp.view_x, vp.view_y)
+                return
+
+        margin = vp.tile_cells
+        x0, y0 = max(0, x0 - margin), max(0, y0 - margin)
+        x1 = min(self.document.width, x1 + margin)
+        y1 = min(self.document.height, y1 + margin)
+        self.canvas.delete(self.grid_tag)
+        self.grid_key = (vp.zoom, vp.subsample, x0, y0, x1, y1)
+        self.grid_origin = (vp.view_x, vp.view_y)
+        if vp.subsample > 1 or vp.zoom < GRID_MIN_ZOOM:
+            return
+
+        left = x0 * vp.zoom - vp.view_x
+        right = x1 * vp.zoom - vp.view_x
+        top = y0 * vp.zoom - vp.view_y
+        bottom = y1 * vp.zoom - vp.view_y
+        state = tk.NORMAL if self.show_grid else tk.HIDDEN
+
+        for x in range(x0, x1 + 1):
+            screen_x = x * vp.zoom - vp.view_x
+            self.canvas.create_line(
+                screen_x, top, screen_x, bottom,
+                fill=GRID_COLOR, tags=self.grid_tag, state=state,
+            )
+        for y in range(y0, y1 + 1):
+            screen_y = y * vp.zoom - vp.view_y
+            self.canvas.create_line(
+                left, screen_y, right, screen_y,
+                fill=GRID_COLOR, tags=self.grid_tag, state=state,
+            )
+
+    def mark_dirty(self, x, y):
+        self.mark_rect(x, y, x + 1, y + 1)
+
+    def mark_rect(self, x0, y0, x1, y1):
+        if self.dirty is None:
+            self.dirty = (x0, y0, x1, y1)
+        else:
+            dx0, dy0, dx1, dy1 = self.dirty
+            self.dirty = (min(dx0, x0), min(dy0, y0), max(dx1, x1), max(dy1, y1))
+
+    def mark_all_dirty(self):
+        self.mark_rect(0, 0, self.document.width, self.document.height)
+
+    def flush(self):
+        """Redraws the dirty rectangle in on-screen tiles, then clears it."""
+        if self.dirty is None:
+            return
+        dx0, dy0, dx1, dy1 = self.dirty
+        self.dirty = None
+
+        for key in list(self.tiles):
+            x0, y0, x1, y1 = self.tile_bounds(key)
+            x0, y0 = max(x0, dx0), max(y0, dy0)
+            x1, y1 = min(x1, dx1), min(y1, dy1)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            if key in self.tile_items:
+                self.paint_region(key, self.tiles[key], x0, y0, x1, y1)
+            else:
+                del self.tiles[key]
+
+    def set_grid_visible(self, visible):
+        self.show_grid = visible
+        self.canvas.itemconfigure(
+            self.grid_tag, state=tk.NORMAL if visible else tk.HIDDEN
+        )
+
+    def destroy(self):
+        """Removes this renderer's tiles and grid lines from the canvas."""
+        for item in self.tile_items.values():
+            self.canvas.delete(item)
+        self.tile_items.clear()
+        self.tiles.clear()
+        self.canvas.delete(self.grid_tag)
+        self.grid_key = None
 
 
 class PixelArtApp:
@@ -32,7 +832,14 @@ class PixelArtApp:
         self.current_color = "#000000"
         self.drawing_mode = "draw"  # States: "draw", "erase", "fill"
         self.show_grid = True
-        self.pixel_data = {}
+        self.is_drawing = False
+        self.document = PixelDocument(PIXEL_GRID_SIZE, PIXEL_GRID_SIZE)
+        self.history = UndoHistory()
+        self.stroke = StrokeEngine(
+            self.paint_stroke_cell,
+            lambda: self.renderer.flush(),
+            master.after_idle,
+        )
 
         # --- Main Layout ---
         main_frame = ttk.Frame(master, padding="10")
@@ -48,6 +855,14 @@ class PixelArtApp:
             highlightbackground="#5d6166",
         )
         self.canvas.grid(row=0, column=0, padx=15, pady=10, sticky="nsew")
+        self.viewport = Viewport(
+            self.document.width, self.document.height, CANVAS_SIZE, CANVAS_SIZE
+        )
+        self.renderer = RasterRenderer(
+            self.canvas, self.document, self.viewport, self.show_grid
+        )
+        self.renderer.render()
+        self.pan_anchor = None
 
         # 2. Controls Panel (Right Side)
         control_panel = ttk.Frame(main_frame, padding="10", style="TFrame")
@@ -112,11 +927,26 @@ class PixelArtApp:
         ttk.Button(actions_frame, text="⬜ Toggle Grid", command=self.toggle_grid).pack(
             fill="x", pady=2
         )
+        ttk.Button(actions_frame, text="↩️ Undo", command=self.undo).pack(
+            fill="x", pady=2
+        )
+        ttk.Button(actions_frame, text="↪️ Redo", command=self.redo).pack(
+            fill="x", pady=2
+        )
+        ttk.Button(
+            actions_frame, text="🔍 Zoom In", command=lambda: self.zoom_view(True)
+        ).pack(fill="x", pady=2)
+        ttk.Button(
+            actions_frame, text="🔎 Zoom Out", command=lambda: self.zoom_view(False)
+        ).pack(fill="x", pady=2)
 
         # --- File Section ---
         file_frame = ttk.LabelFrame(control_panel, text="File", padding="10")
         file_frame.pack(pady=10, fill="x")
 
+        ttk.Button(file_frame, text="🆕 New Project", command=self.new_project).pack(
+            fill="x", pady=2
+        )
         ttk.Button(file_frame, text="💾 Save Project", command=self.save_project).pack(
             fill="x", pady=2
         )
@@ -126,9 +956,20 @@ class PixelArtApp:
 
         self.canvas.bind("<Button-1>", self.handle_click)
         self.canvas.bind("<B1-Motion>", self.draw_pixel)
+        self.canvas.bind("<ButtonRelease-1>", self.end_stroke)
+
+        # Pan with the right or middle button, zoom with the wheel
+        for button in (2, 3):
+            self.canvas.bind(f"<Button-{button}>", self.start_pan)
+            self.canvas.bind(f"<B{button}-Motion>", self.pan_view)
         self.canvas.bind(
-            "<ButtonRelease-1>", lambda e: setattr(self, "is_drawing", False)
+            "<MouseWheel>", lambda e: self.zoom_view(e.delta > 0, e.x, e.y)
         )
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_view(True, e.x, e.y))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_view(False, e.x, e.y))
+        master.bind("<Control-z>", lambda e: self.undo())
+        master.bind("<Control-y>", lambda e: self.redo())
+        master.bind("<Control-Z>", lambda e: self.redo())
 
         self.set_color("#000000")
 
@@ -184,67 +1025,55 @@ class PixelArtApp:
 
     def clear_canvas(self):
         """Removes all pixels and resets the state."""
-        self.canvas.delete("all")
-        self.pixel_data.clear()
+        # Recorded as one undoable action
+        self.history.begin(self.document.width)
+        self.history.record_plane(self.document.pixels, 0)
+        self.history.commit()
+
+        self.document.clear()
+        self.renderer.mark_all_dirty()
+        self.renderer.flush()
         self.set_drawing_mode("draw")  # Reset mode to default pencil
         self.set_color("#000000")  # Reset color to black
 
     # --- Drawing Logic (Enhanced) ---
 
     def get_grid_coords(self, event):
-        grid_x = event.x // PIXEL_SIZE
-        grid_y = event.y // PIXEL_SIZE
-        return grid_x, grid_y
-
-    def get_pixel_color(self, grid_x, grid_y):
-        """Helper to get the actual color of a cell, handling empty cells."""
-        key = (grid_x, grid_y)
-        if key in self.pixel_data:
-            return self.pixel_data[key]["color"]
-        return ERASER_COLOR  # Default color if pixel hasn't been drawn
+        return self.viewport.screen_to_cell(event.x, event.y)
 
     def update_pixel_state(self, grid_x, grid_y, color):
-        """Creates or updates a single pixel on the canvas and in the data structure."""
-        key = (grid_x, grid_y)
-
-        # 1. Handle Erasing/Emptying
-        if color == ERASER_COLOR:
-            if key in self.pixel_data:
-                self.canvas.delete(self.pixel_data[key]["id"])
-                del self.pixel_data[key]
+        """Writes a single pixel into the document and marks it for redraw."""
+        if not self.document.in_bounds(grid_x, grid_y):
             return
 
-        # 2. Prepare visual attributes
-        outline_color = "#E0E0E0" if self.show_grid else color
-
-        # 3. Create or Update
-        x0 = grid_x * PIXEL_SIZE
-        y0 = grid_y * PIXEL_SIZE
-        x1 = x0 + PIXEL_SIZE
-        y1 = y0 + PIXEL_SIZE
-
-        if key in self.pixel_data:
-            # Update existing pixel
-            item_id = self.pixel_data[key]["id"]
-            self.canvas.itemconfig(item_id, fill=color, outline=outline_color)
-            self.pixel_data[key]["color"] = color
-        else:
-            # Create new pixel
-            item_id = self.canvas.create_rectangle(
-                x0, y0, x1, y1, fill=color, outline=outline_color, width=1
-            )
-            self.pixel_data[key] = {"color": color, "id": item_id}
+        doc = self.document
+        index = doc.color_index(color)
+        offset = grid_y * doc.width + grid_x
+        if doc.pixels[offset] != index:
+            self.history.record(offset, doc.pixels[offset], index)
+            doc.pixels[offset] = index
+            self.renderer.mark_dirty(grid_x, grid_y)
 
     def handle_click(self, event):
         """Decides action based on drawing mode."""
         grid_x, grid_y = self.get_grid_coords(event)
 
-        if 0 <= grid_x < PIXEL_GRID_SIZE and 0 <= grid_y < PIXEL_GRID_SIZE:
+        if self.document.in_bounds(grid_x, grid_y):
             if self.drawing_mode == "fill":
+                self.history.begin(self.document.width)
                 self.flood_fill(grid_x, grid_y)
+                self.history.commit()
             else:
                 self.is_drawing = True
-                self.draw_pixel(event)
+                self.history.begin(self.document.width)
+                self.stroke.begin(grid_x, grid_y)
+
+    def end_stroke(self, event):
+        """Closes the current pencil/eraser stroke as one undo step."""
+        if self.is_drawing:
+            self.is_drawing = False
+            self.stroke.end()
+            self.history.commit()
 
     def draw_pixel(self, event):
         """Handles Pencil and Eraser mode during drag/motion."""
@@ -252,7 +1081,9 @@ class PixelArtApp:
             return
 
         grid_x, grid_y = self.get_grid_coords(event)
+        self.stroke.add_point(grid_x, grid_y)
 
+    def paint_stroke_cell(self, grid_x, grid_y):
         if self.drawing_mode == "erase":
             self.update_pixel_state(grid_x, grid_y, ERASER_COLOR)
         else:  # Draw mode
@@ -262,66 +1093,160 @@ class PixelArtApp:
 
     def flood_fill(self, start_x, start_y):
         """
-        Implementation of the Iterative Flood Fill Algorithm.
-        Finds contiguous pixels of the same color and fills them.
+        Implementation of the Iterative Scanline Flood Fill Algorithm.
+        Finds contiguous pixels of the same color and fills them one
+        horizontal span at a time, so each span is a single undo run.
         """
-        target_color = self.get_pixel_color(start_x, start_y)
-        fill_color = self.current_color
+        doc = self.document
+        width, height = doc.width, doc.height
+        pixels = doc.pixels
+        target = pixels[start_y * width + start_x]
+        fill = doc.color_index(self.current_color)
 
         # Do nothing if the fill color is the same as the target color
-        if target_color == fill_color:
+        if target == fill:
             return
 
-        # Use a deque (double-ended queue) for the iterative search
+        # Use a deque (double-ended queue) of seed cells for the iterative search
         queue = collections.deque([(start_x, start_y)])
 
         while queue:
             x, y = queue.popleft()
+            row = y * width
 
-            # Check boundaries and if the current pixel matches the target color
-            if not (0 <= x < PIXEL_GRID_SIZE and 0 <= y < PIXEL_GRID_SIZE):
+            # Seeds can be filled by an earlier span before they are reached
+            if pixels[row + x] != target:
                 continue
 
-            if self.get_pixel_color(x, y) != target_color:
-                continue
+            # Grow the span left and right while the target color continues
+            left = x
+            while left > 0 and pixels[row + left - 1] == target:
+                left -= 1
+            right = x + 1
+            while right < width and pixels[row + right] == target:
+                right += 1
+
+            pixels[row + left : row + right] = array.array("H", [fill]) * (
+                right - left
+            )
+            self.history.record_run(row + left, right - left, target, fill)
+            self.renderer.mark_rect(left, y, right, y + 1)
 
-            # Change the color of the current pixel
-            self.update_pixel_state(x, y, fill_color)
+            # Queue one seed per target-colored run in the rows above and below
+            for ny in (y - 1, y + 1):
+                if not 0 <= ny < height:
+                    continue
+                neighbor_row = ny * width
+                nx = left
+                for value, run in itertools.groupby(
+                    pixels[neighbor_row + left : neighbor_row + right]
+                ):
+                    if value == target:
+                        queue.append((nx, ny))
+                    nx += len(list(run))
 
-            # Add neighbors to the queue
-            queue.append((x + 1, y))  # East
-            queue.append((x - 1, y))  # West
-            queue.append((x, y + 1))  # South
-            queue.append((x, y - 1))  # North
+        self.renderer.flush()
 
     # --- Utility Methods ---
 
     def toggle_grid(self):
         self.show_grid = not self.show_grid
+        self.renderer.set_grid_visible(self.show_grid)
 
-        for key, data in self.pixel_data.items():
-            color = data["color"]
+    def start_pan(self, event):
+        self.pan_anchor = (event.x, event.y)
 
-            if self.show_grid:
-                outline = "#E0E0E0"
-            else:
-                outline = color
+    def pan_view(self, event):
+        if self.pan_anchor is None:
+            return
+        last_x, last_y = self.pan_anchor
+        self.pan_anchor = (event.x, event.y)
+        self.viewport.pan(last_x - event.x, last_y - event.y)
+        self.renderer.render()
+
+    def zoom_view(self, zoom_in, x=CANVAS_SIZE // 2, y=CANVAS_SIZE // 2):
+        if self.viewport.zoom_at(x, y, zoom_in):
+            self.renderer.render()
 
-            self.canvas.itemconfig(data["id"], outline=outline)
+    def undo(self):
+        if self.is_drawing:
+            return
+        delta = self.history.undo(self.document.pixels)
+        if delta:
+            self.renderer.mark_rect(*delta.bounds)
+            self.renderer.flush()
+
+    def redo(self):
+        if self.is_drawing:
+            return
+        delta = self.history.redo(self.document.pixels)
+        if delta:
+            self.renderer.mark_rect(*delta.bounds)
+            self.renderer.flush()
+
+    # --- File Management ---
 
-    # File Management is kept the same as the previous version for conciseness
-    # ... (Save/Load methods are omitted here but assumed to be present and functional) ...
     def save_project(self):
-        messagebox.showinfo(
-            "Save",
-            "Save logic is functional but requires external JSON library to run.",
+        path = filedialog.asksaveasfilename(
+            title="Save Project",
+            defaultextension=".pxa",
+            filetypes=[("Pixel Art Project", "*.pxa"), ("JSON", "*.json")],
         )
+        if not path:
+            return
+        try:
+            if path.lower().endswith(".json"):
+                save_json(self.document, path)
+            else:
+                save_binary(self.document, path)
+        except OSError as e:
+            messagebox.showerror("Save", f"Could not save project:\n{e}")
 
     def load_project(self):
-        messagebox.showinfo(
-            "Load",
-            "Load logic is functional but requires external JSON library to run.",
+        path = filedialog.askopenfilename(
+            title="Load Project",
+            filetypes=[("Pixel Art Project", "*.pxa"), ("JSON", "*.json")],
         )
+        if not path:
+            return
+        try:
+            if path.lower().endswith(".json"):
+                document = load_json(path)
+            else:
+                document = load_binary(path)
+            self.set_document(document)
+        except (OSError, ValueError, tk.TclError) as e:
+            messagebox.showerror("Load", f"Could not load project:\n{e}")
+
+    def new_project(self):
+        size = simpledialog.askinteger(
+            "New Project",
+            "Grid size (cells per side):",
+            initialvalue=PIXEL_GRID_SIZE,
+            minvalue=1,
+            maxvalue=MAX_GRID_SIZE,
+        )
+        if size:
+            self.set_document(PixelDocument(size, size))
+
+    def set_document(self, document):
+        """
+        Replaces the open document and fits a fresh viewport to its size.
+        The current document stays open if the new one fails to render.
+        """
+        viewport = Viewport(document.width, document.height, CANVAS_SIZE, CANVAS_SIZE)
+        renderer = RasterRenderer(self.canvas, document, viewport, self.show_grid)
+        try:
+            renderer.render()
+        except tk.TclError:
+            renderer.destroy()
+            raise
+
+        self.renderer.destroy()
+        self.document = document
+        self.viewport = viewport
+        self.renderer = renderer
+        self.history.clear()
 
 
 if __name__ == "__main__":
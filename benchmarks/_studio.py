@@ -0,0 +1,59 @@
+"""Shared helpers for the benchmark scripts and the test suite."""
+
+import importlib.util
+import pathlib
+
+STUDIO_PATH = pathlib.Path(__file__).resolve().parent.parent / "Pixel-Art-Studio.py"
+
+
+def load_studio():
+    """Imports Pixel-Art-Studio.py, whose file name is not a valid module name."""
+    spec = importlib.util.spec_from_file_location("pixel_art_studio", STUDIO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class NullImage:
+    """A PhotoImage stand-in that discards pixels, for timing without a display."""
+
+    def __init__(self, width, height):
+        self.tk = self
+
+    def put(self, data, to):
+        pass
+
+    def call(self, *args):
+        pass
+
+
+class NullCanvas:
+    """A Canvas stand-in that only counts the items created on it."""
+
+    def __init__(self):
+        self.items = 0
+        self.lines_created = 0
+
+    def create_image(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+
+    def create_line(self, *args, **kwargs):
+        self.lines_created += 1
+        self.items += 1
+        return self.items
+
+    def coords(self, *args):
+        pass
+
+    def move(self, *args):
+        pass
+
+    def tag_raise(self, *args):
+        pass
+
+    def delete(self, *args):
+        pass
+
+    def itemconfigure(self, *args, **kwargs):
+        pass
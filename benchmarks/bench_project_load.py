@@ -0,0 +1,89 @@
+"""
+Save/load and load-to-first-paint times for a large document.
+
+Run from the repository root:
+    python benchmarks/bench_project_load.py [grid size]
+
+First paint builds every visible tile through RasterRenderer.render(). The
+PhotoImage and Canvas are replaced by no-op stand-ins so this runs without a
+display; the time therefore covers loading plus preparing the tile data,
+not Tk's own pixel upload.
+"""
+
+import array
+import pathlib
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _studio import NullCanvas, NullImage, load_studio
+
+
+def make_document(studio, size):
+    """Blocky sprite-sheet-like content with some noise."""
+    random.seed(3)
+    doc = studio.PixelDocument(size, size)
+    colors = [doc.color_index(f"#{r:02X}{g:02X}80") for r in range(0, 256, 64)
+              for g in range(0, 256, 64)]
+    for y in range(size):
+        row = array.array(
+            "H", [colors[(x // 32 + y // 32) % len(colors)] for x in range(size)]
+        )
+        for _ in range(size // 64):
+            row[random.randrange(size)] = random.choice(colors)
+        doc.pixels[y * size : (y + 1) * size] = row
+    return doc
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def main():
+    studio = load_studio()
+    studio.tk.PhotoImage = NullImage
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    doc = make_document(studio, size)
+    print(f"{size}x{size} document, {len(doc.palette)} colors")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save, load in (
+            ("binary", studio.save_binary, studio.load_binary),
+            ("json", studio.save_json, studio.load_json),
+        ):
+            path = pathlib.Path(tmp) / f"art.{name}"
+            _, save_time = timed(lambda: save(doc, path))
+
+            def first_paint():
+                loaded = load(path)
+                viewport = studio.Viewport(
+                    loaded.width, loaded.height,
+                    studio.CANVAS_SIZE, studio.CANVAS_SIZE,
+                )
+                studio.RasterRenderer(NullCanvas(), loaded, viewport).render()
+                return loaded
+
+            loaded, load_time = timed(lambda: load(path))
+            assert loaded.pixels == doc.pixels and loaded.palette == doc.palette
+            del loaded
+            _, paint_time = timed(first_paint)
+
+            tracemalloc.start()
+            load(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            print(
+                f"{name:<7} size={path.stat().st_size / 1e6:7.2f} MB  "
+                f"save={save_time * 1e3:7.0f} ms  load={load_time * 1e3:6.0f} ms  "
+                f"load+first paint={paint_time * 1e3:6.0f} ms  "
+                f"load peak={peak / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
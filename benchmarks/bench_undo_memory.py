@@ -0,0 +1,102 @@
+"""
+Memory and time per undoable operation.
+
+Run from the repository root:
+    python benchmarks/bench_undo_memory.py [grid size]
+"""
+
+import array
+import random
+import sys
+import time
+import tracemalloc
+
+from _studio import load_studio
+
+
+class NullRenderer:
+    def mark_rect(self, *rect):
+        pass
+
+    def mark_dirty(self, x, y):
+        pass
+
+    def flush(self):
+        pass
+
+
+def make_app(studio, size):
+    app = studio.PixelArtApp.__new__(studio.PixelArtApp)
+    app.document = studio.PixelDocument(size, size)
+    app.history = studio.UndoHistory(max_bytes=1 << 40)
+    app.renderer = NullRenderer()
+    app.current_color = "#FF0000"
+    return app
+
+
+def measure(name, history, pixels, action):
+    """Times the action, undoes it, then repeats it under tracemalloc."""
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+
+    delta = history.undo_stack[-1]
+    undo_start = time.perf_counter()
+    history.undo(pixels)
+    undo_time = time.perf_counter() - undo_start
+
+    # Tracing slows Python down a lot, so it gets its own pass
+    history.redo_stack.clear()
+    tracemalloc.start()
+    action()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{name:<24} runs={len(delta):>9,} stored={delta.nbytes:>11,} B "
+        f"peak={peak / 1e6:8.1f} MB  op={elapsed * 1e3:8.1f} ms  "
+        f"undo={undo_time * 1e3:7.2f} ms"
+    )
+
+
+def main():
+    studio = load_studio()
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    app = make_app(studio, size)
+    doc, history = app.document, app.history
+    print(f"{size}x{size} document")
+
+    def fill():
+        history.begin(doc.width)
+        app.flood_fill(0, 0)
+        history.commit()
+
+    measure("flood fill (full)", history, doc.pixels, fill)
+
+    def stroke():
+        history.begin(doc.width)
+        index = doc.color_index("#0000FF")
+        for i in range(size):
+            offset = (i * size + i) % len(doc.pixels)
+            history.record(offset, doc.pixels[offset], index)
+            doc.pixels[offset] = index
+        history.commit()
+
+    measure(f"diagonal stroke ({size})", history, doc.pixels, stroke)
+
+    # Like clear_canvas, so the peak includes the freshly zeroed plane
+    def clear():
+        history.begin(doc.width)
+        history.record_plane(doc.pixels, 0)
+        history.commit()
+        doc.pixels[:] = array.array("H", bytes(len(doc.pixels) * 2))
+
+    measure("clear (filled canvas)", history, doc.pixels, clear)
+
+    random.seed(1)
+    palette = [doc.color_index(f"#0000{i:02X}") for i in range(16)]
+    doc.pixels[:] = array.array("H", (random.choice(palette) for _ in doc.pixels))
+    measure("clear (random noise)", history, doc.pixels, clear)
+
+
+if __name__ == "__main__":
+    main()
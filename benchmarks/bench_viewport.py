@@ -0,0 +1,69 @@
+"""
+Pan/zoom frame times of the tiled viewport on a large document.
+
+Run from the repository root:
+    python benchmarks/bench_viewport.py [grid size]
+
+PhotoImage and Canvas are replaced by no-op stand-ins so this runs without a
+display. Frame times cover choosing tiles, building their pixel data and
+placing items, not Tk's own upload and redraw. Tile contents are checked
+against the document in tests/test_viewport.py.
+"""
+
+import array
+import random
+import statistics
+import sys
+import time
+
+from _studio import NullCanvas, NullImage, load_studio
+
+
+def timed_ms(action):
+    start = time.perf_counter()
+    action()
+    return (time.perf_counter() - start) * 1e3
+
+
+def main():
+    studio = load_studio()
+    studio.tk.PhotoImage = NullImage
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+
+    random.seed(5)
+    doc = studio.PixelDocument(size, size)
+    colors = [doc.color_index(f"#{i * 15:02X}4080") for i in range(16)]
+    doc.pixels = array.array("H", (random.choice(colors) for _ in range(size * size)))
+
+    viewport = studio.Viewport(size, size, studio.CANVAS_SIZE, studio.CANVAS_SIZE)
+    canvas = NullCanvas()
+    renderer = studio.RasterRenderer(canvas, doc, viewport)
+    print(f"{size}x{size} document")
+    print(f"first frame {timed_ms(renderer.render):8.1f} ms")
+
+    zoomed = []
+
+    while True:
+        zoom_time = timed_ms(lambda: zoomed.append(viewport.zoom_at(300, 300, True)))
+        if not zoomed[-1]:
+            break
+        renderer_time = timed_ms(renderer.render)
+
+        # Small pans reuse cached tiles; long pans expose new ones
+        lines_before = canvas.lines_created
+        frames = []
+        for i in range(120):
+            dx = 9 if i % 40 < 20 else -9
+            frames.append(timed_ms(lambda: (viewport.pan(dx, 4), renderer.render())))
+        print(
+            f"zoom={viewport.zoom:>2} subsample={viewport.subsample:>2}  "
+            f"zoom frame {zoom_time + renderer_time:7.1f} ms  "
+            f"pan median {statistics.median(frames):6.2f} ms  "
+            f"max {max(frames):6.1f} ms  "
+            f"grid lines created {canvas.lines_created - lines_before:>5}  "
+            f"cached tiles {len(renderer.tiles)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
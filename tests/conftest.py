@@ -0,0 +1,13 @@
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from _studio import load_studio  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def studio():
+    return load_studio()
@@ -0,0 +1,211 @@
+import array
+import json
+import random
+import struct
+import zlib
+
+import pytest
+
+
+@pytest.fixture
+def document(studio):
+    random.seed(7)
+    doc = studio.PixelDocument(37, 23)
+    palette = [doc.color_index(f"#{i * 40:02X}80{255 - i * 40:02X}") for i in range(6)]
+    doc.pixels = array.array(
+        "H", (random.choice([0] + palette) for _ in range(37 * 23))
+    )
+    return doc
+
+
+def assert_same(loaded, original):
+    assert (loaded.width, loaded.height) == (original.width, original.height)
+    assert loaded.palette == original.palette
+    assert loaded.palette_lookup == original.palette_lookup
+    assert loaded.pixels == original.pixels
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+def test_round_trip(studio, document, tmp_path, fmt):
+    save, load = getattr(studio, f"save_{fmt}"), getattr(studio, f"load_{fmt}")
+    path = tmp_path / f"art.{fmt}"
+    save(document, path)
+    assert_same(load(path), document)
+
+
+def test_binary_round_trip_with_large_palette(studio, tmp_path):
+    doc = studio.PixelDocument(40, 40)
+    for i in range(299):
+        doc.color_index(f"#00{i // 256:02X}{i % 256:02X}")
+    doc.pixels = array.array("H", [i % 300 for i in range(1600)])
+    path = tmp_path / "art.pxa"
+    studio.save_binary(doc, path)
+    assert_same(studio.load_binary(path), doc)
+
+
+def write_json(tmp_path, **overrides):
+    data = {
+        "format": "pixel-art-studio",
+        "version": 1,
+        "width": 2,
+        "height": 1,
+        "palette": ["#FFFFFF", "#FF0000"],
+        "pixels": [0, 1],
+    }
+    data.update(overrides)
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"pixels": [0, -1]},
+        {"pixels": [0, 70000]},
+        {"pixels": [0, 2]},
+        {"pixels": [0, 1.5]},
+        {"pixels": [0]},
+        {"palette": ["#FFFFFF", "bogus color"]},
+        {"palette": ["#FF0000", "#FFFFFF"]},
+        {"palette": ["#FFFFFF", "#FF0000", "#FF0000"]},
+        {"width": 200000, "height": 1},
+        {"width": 0},
+        {"width": "2"},
+        {"format": "something-else"},
+    ],
+)
+def test_bad_json_raises_value_error(studio, tmp_path, overrides):
+    with pytest.raises(ValueError):
+        studio.load_json(write_json(tmp_path, **overrides))
+
+
+def test_json_top_level_list_raises_value_error(studio, tmp_path):
+    path = tmp_path / "list.json"
+    path.write_text("[1, 2, 3]")
+    with pytest.raises(ValueError):
+        studio.load_json(path)
+
+
+def binary_bytes(studio, document, tmp_path):
+    path = tmp_path / "good.pxa"
+    studio.save_binary(document, path)
+    return path.read_bytes()
+
+
+def load_bytes(studio, tmp_path, data):
+    path = tmp_path / "bad.pxa"
+    path.write_bytes(data)
+    return studio.load_binary(path)
+
+
+@pytest.mark.parametrize("keep", [0, 3, 12, 20, 60, -5])
+def test_truncated_binary_raises_value_error(studio, document, tmp_path, keep):
+    data = binary_bytes(studio, document, tmp_path)
+    with pytest.raises(ValueError):
+        load_bytes(studio, tmp_path, data[:keep])
+
+
+def test_corrupt_binary_plane_raises_value_error(studio, document, tmp_path):
+    data = bytearray(binary_bytes(studio, document, tmp_path))
+    for i in range(len(data) - 40, len(data) - 20):
+        data[i] ^= 0xA5
+    with pytest.raises(ValueError):
+        load_bytes(studio, tmp_path, bytes(data))
+
+
+def test_binary_header_too_large_raises_value_error(studio, document, tmp_path):
+    data = bytearray(binary_bytes(studio, document, tmp_path))
+    struct.pack_into("<II", data, 5, 200000, 200000)
+    with pytest.raises(ValueError):
+        load_bytes(studio, tmp_path, bytes(data))
+
+
+def test_binary_plane_size_mismatch_raises_value_error(studio, document, tmp_path):
+    data = bytearray(binary_bytes(studio, document, tmp_path))
+    struct.pack_into("<II", data, 5, document.width, document.height - 1)
+    with pytest.raises(ValueError):
+        load_bytes(studio, tmp_path, bytes(data))
+
+
+@pytest.mark.parametrize(
+    "palette_size, bad_index", [(7, 7), (7, 300), (300, 300), (300, 511)]
+)
+def test_binary_index_out_of_palette_raises_value_error(
+    studio, tmp_path, palette_size, bad_index
+):
+    doc = studio.PixelDocument(16, 16)
+    for i in range(palette_size - 1):
+        doc.color_index(f"#00{i // 256:02X}{i % 256:02X}")
+    doc.pixels[200] = bad_index
+    path = tmp_path / "art.pxa"
+    studio.save_binary(doc, path)
+    with pytest.raises(ValueError):
+        studio.load_binary(path)
+
+
+def test_binary_bad_palette_color_raises_value_error(studio, tmp_path):
+    doc = studio.PixelDocument(4, 4)
+    doc.palette.append("bogus color")
+    path = tmp_path / "art.pxa"
+    studio.save_binary(doc, path)
+    with pytest.raises(ValueError):
+        studio.load_binary(path)
+
+
+def test_binary_extra_plane_data_raises_value_error(studio, tmp_path):
+    doc = studio.PixelDocument(4, 4)
+    path = tmp_path / "art.pxa"
+    studio.save_binary(doc, path)
+    # Header, palette count, then the single eraser color entry
+    palette_end = studio.BINARY_HEADER.size + 2 + 1 + len(studio.ERASER_COLOR)
+    compressed = zlib.compress(bytes(4 * 4 * 2 + 2))
+    data = path.read_bytes()[:palette_end]
+    path.write_bytes(data + struct.pack("<I", len(compressed)) + compressed)
+    with pytest.raises(ValueError):
+        studio.load_binary(path)
+
+
+class FakeRenderer:
+    instances = []
+
+    def __init__(self, canvas, document, viewport, show_grid=True):
+        self.document = document
+        self.destroyed = False
+        FakeRenderer.instances.append(self)
+
+    def render(self):
+        if self.document.width == 13:
+            raise FakeRenderer.error("render failed")
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def test_set_document_keeps_old_state_when_render_fails(studio, monkeypatch):
+    FakeRenderer.error = studio.tk.TclError
+    monkeypatch.setattr(studio, "RasterRenderer", FakeRenderer)
+    app = studio.PixelArtApp.__new__(studio.PixelArtApp)
+    app.canvas = None
+    app.show_grid = True
+    app.history = studio.UndoHistory()
+    old_document = studio.PixelDocument(4, 4)
+    app.document = old_document
+    app.renderer = old_renderer = FakeRenderer(None, old_document, None)
+    app.history.begin(4)
+    app.history.record(0, 0, 1)
+    app.history.commit()
+
+    with pytest.raises(studio.tk.TclError):
+        app.set_document(studio.PixelDocument(13, 13))
+
+    assert app.document is old_document
+    assert app.renderer is old_renderer and not old_renderer.destroyed
+    assert FakeRenderer.instances[-1].destroyed
+    assert len(app.history.undo_stack) == 1
+
+    new_document = studio.PixelDocument(8, 8)
+    app.set_document(new_document)
+    assert app.document is new_document
+    assert old_renderer.destroyed
+    assert not app.history.undo_stack
@@ -0,0 +1,107 @@
+import pytest
+
+
+def assert_gapless(cells):
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        assert max(abs(x1 - x0), abs(y1 - y0)) == 1, ((x0, y0), (x1, y1))
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [((0, 0), (5, 2)), ((4, 0), (0, -3)), ((2, 2), (2, 9)), ((0, 0), (-7, -7))],
+)
+def test_bresenham_line_is_gapless(studio, start, end):
+    cells = list(studio.bresenham_line(*start, *end))
+
+    assert cells[0] == start
+    assert cells[-1] == end
+    assert len(cells) == max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1
+    assert_gapless(cells)
+
+
+def test_bresenham_single_point(studio):
+    assert list(studio.bresenham_line(3, 3, 3, 3)) == [(3, 3)]
+
+
+@pytest.fixture
+def engine(studio):
+    painted = []
+    flushes = []
+    scheduled = []
+    engine = studio.StrokeEngine(
+        lambda x, y: painted.append((x, y)),
+        lambda: flushes.append(len(painted)),
+        scheduled.append,
+    )
+    return engine, painted, flushes, scheduled
+
+
+def run_frame(scheduled):
+    callbacks = scheduled[:]
+    scheduled.clear()
+    for callback in callbacks:
+        callback()
+
+
+def test_fast_stroke_is_interpolated_and_deduplicated(engine):
+    engine, painted, flushes, scheduled = engine
+    engine.begin(0, 0)
+    for point in [(10, 0), (10, 10), (0, 0), (10, 0)]:
+        engine.add_point(*point)
+
+    # Nothing is painted until the frame runs, and only one flush is queued
+    assert painted == []
+    assert len(scheduled) == 1
+    run_frame(scheduled)
+
+    assert len(painted) == len(set(painted)) == 30
+    assert_gapless(painted[:21])  # The first two segments
+    assert flushes == [30]
+
+
+def test_one_flush_per_batch(engine):
+    engine, painted, flushes, scheduled = engine
+    engine.begin(0, 0)
+    for frame in range(3):
+        for i in range(5):
+            engine.add_point(frame * 5 + i + 1, 0)
+        assert len(scheduled) == 1
+        run_frame(scheduled)
+
+    assert painted == [(x, 0) for x in range(16)]
+    assert flushes == [6, 11, 16]
+
+
+def test_revisited_cells_are_not_rescheduled(engine):
+    engine, painted, flushes, scheduled = engine
+    engine.begin(0, 0)
+    engine.add_point(3, 0)
+    run_frame(scheduled)
+
+    engine.add_point(0, 0)  # Back over cells already painted in this stroke
+    assert scheduled == []
+    assert painted == [(0, 0), (1, 0), (2, 0), (3, 0)]
+
+
+def test_end_flushes_remaining_queue(engine):
+    engine, painted, flushes, scheduled = engine
+    engine.begin(0, 0)
+    engine.add_point(0, 4)
+    engine.end()
+
+    assert painted == [(0, y) for y in range(5)]
+    assert flushes == [5]
+
+    # The stale idle callback is harmless once the stroke has ended
+    run_frame(scheduled)
+    assert flushes == [5]
+
+
+def test_new_stroke_can_repaint_cells(engine):
+    engine, painted, flushes, scheduled = engine
+    engine.begin(1, 1)
+    engine.end()
+    engine.begin(1, 1)
+    engine.end()
+
+    assert painted == [(1, 1), (1, 1)]
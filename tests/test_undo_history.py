@@ -0,0 +1,203 @@
+import array
+
+import pytest
+
+
+def make_document(studio, width=8, height=4):
+    doc = studio.PixelDocument(width, height)
+    for color in ("#FF0000", "#00FF00", "#0000FF"):
+        doc.color_index(color)
+    return doc
+
+
+def runs(delta):
+    return list(
+        zip(delta.starts, delta.lengths, delta.old_values, delta.new_values)
+    )
+
+
+def test_delta_merges_contiguous_cells_into_runs(studio):
+    delta = studio.PixelDelta(8)
+    for offset in (2, 3, 4):
+        delta.add(offset, 1, 0, 1)
+    delta.add(5, 1, 0, 2)  # Different new value starts a new run
+    delta.add(9, 1, 0, 2)  # Gap starts a new run
+
+    assert runs(delta) == [(2, 3, 0, 1), (5, 1, 0, 2), (9, 1, 0, 2)]
+    assert delta.bounds == (1, 0, 6, 2)
+
+
+def test_delta_bounds_for_run_wrapping_rows(studio):
+    delta = studio.PixelDelta(8)
+    delta.add(6, 4, 0, 1)  # Cells (6,0), (7,0), (0,1), (1,1)
+
+    assert runs(delta) == [(6, 4, 0, 1)]
+    assert delta.bounds == (0, 0, 8, 2)
+
+
+def test_delta_add_plane_skips_unchanged_cells(studio):
+    doc = make_document(studio)
+    doc.pixels[1:4] = array.array("H", [1, 1, 2])
+    doc.pixels[30] = 3
+
+    delta = studio.PixelDelta(doc.width)
+    delta.add_plane(doc.pixels, 0)
+
+    assert runs(delta) == [(1, 2, 1, 0), (3, 1, 2, 0), (30, 1, 3, 0)]
+    assert delta.bounds == (1, 0, 7, 4)
+
+
+def test_full_plane_change_is_one_run(studio):
+    doc = make_document(studio, 64, 64)
+    doc.pixels = array.array("H", [2]) * (64 * 64)
+
+    delta = studio.PixelDelta(doc.width)
+    delta.add_plane(doc.pixels, 0)
+
+    assert runs(delta) == [(0, 64 * 64, 2, 0)]
+    assert delta.nbytes == 12
+
+
+def record(studio, history, doc, cells, new):
+    history.begin(doc.width)
+    for offset in cells:
+        history.record(offset, doc.pixels[offset], new)
+        doc.pixels[offset] = new
+    history.commit()
+
+
+def test_undo_redo_round_trip(studio):
+    doc = make_document(studio)
+    history = studio.UndoHistory()
+    blank = doc.pixels[:]
+    record(studio, history, doc, [0, 1, 9], 1)
+    first = doc.pixels[:]
+    record(studio, history, doc, [1, 2, 31], 2)
+    second = doc.pixels[:]
+
+    assert history.undo(doc.pixels).bounds == (1, 0, 8, 4)
+    assert doc.pixels == first
+    history.undo(doc.pixels)
+    assert doc.pixels == blank
+    assert history.undo(doc.pixels) is None
+
+    history.redo(doc.pixels)
+    assert doc.pixels == first
+    history.redo(doc.pixels)
+    assert doc.pixels == second
+    assert history.redo(doc.pixels) is None
+
+
+def test_new_commit_clears_redo(studio):
+    doc = make_document(studio)
+    history = studio.UndoHistory()
+    record(studio, history, doc, [0], 1)
+    record(studio, history, doc, [1], 2)
+    history.undo(doc.pixels)
+    assert history.redo_stack
+
+    record(studio, history, doc, [2], 3)
+
+    assert not history.redo_stack
+    assert history.total_bytes == sum(d.nbytes for d in history.undo_stack)
+    assert history.redo(doc.pixels) is None
+
+
+def test_empty_action_is_not_pushed(studio):
+    doc = make_document(studio)
+    history = studio.UndoHistory()
+    history.begin(doc.width)
+    history.commit()
+
+    assert not history.undo_stack
+    assert not history.recording
+
+
+def test_record_run_and_plane(studio):
+    doc = make_document(studio)
+    doc.pixels[8:12] = array.array("H", [2]) * 4
+    history = studio.UndoHistory()
+    history.begin(doc.width)
+    history.record_plane(doc.pixels, 0)
+    history.record_run(20, 3, 0, 1)
+    history.commit()
+
+    delta = history.undo_stack[-1]
+    assert runs(delta) == [(8, 4, 2, 0), (20, 3, 0, 1)]
+    assert delta.bounds == (0, 1, 7, 3)
+
+
+def test_record_outside_an_action_is_ignored(studio):
+    doc = make_document(studio)
+    history = studio.UndoHistory()
+    history.record(0, 0, 1)
+    history.record_run(0, 4, 0, 1)
+    history.record_plane(doc.pixels, 1)
+
+    assert not history.recording
+    assert not history.undo_stack
+
+
+def test_budget_evicts_oldest_entries(studio):
+    doc = make_document(studio, 64, 64)
+    history = studio.UndoHistory(max_bytes=100)
+    for i in range(10):
+        # Three separate cells -> three runs of 12 bytes each
+        record(studio, history, doc, [i * 200, i * 200 + 2, i * 200 + 4], 1)
+
+    assert history.total_bytes <= 100
+    assert len(history.undo_stack) == 2
+    assert [d.starts[0] for d in history.undo_stack] == [1600, 1800]
+
+
+def test_budget_keeps_latest_entry_even_if_oversized(studio):
+    doc = make_document(studio, 64, 64)
+    history = studio.UndoHistory(max_bytes=10)
+    record(studio, history, doc, [0, 2, 4], 1)
+    record(studio, history, doc, [10, 12, 14], 1)
+
+    assert len(history.undo_stack) == 1
+    assert history.undo_stack[0].starts[0] == 10
+
+
+class FakeRenderer:
+    def mark_rect(self, *rect):
+        pass
+
+    def mark_dirty(self, x, y):
+        pass
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def app(studio):
+    """A PixelArtApp with just the state the drawing logic needs, no Tk."""
+    app = studio.PixelArtApp.__new__(studio.PixelArtApp)
+    app.document = make_document(studio, 6, 5)
+    app.history = studio.UndoHistory()
+    app.renderer = FakeRenderer()
+    app.current_color = "#FF0000"
+    return app
+
+
+def test_flood_fill_records_spans_and_undoes(studio, app):
+    doc = app.document
+    # A wall at x == 2 splits the canvas, with a gap in the bottom row
+    for y in range(4):
+        doc.pixels[y * doc.width + 2] = 3
+    before = doc.pixels[:]
+
+    app.history.begin(doc.width)
+    app.flood_fill(0, 0)
+    app.history.commit()
+
+    red = doc.color_index("#FF0000")
+    assert doc.pixels.count(red) == 6 * 5 - 4
+    delta = app.history.undo_stack[-1]
+    assert len(delta) < doc.pixels.count(red)
+    assert delta.bounds == (0, 0, 6, 5)
+
+    app.history.undo(doc.pixels)
+    assert doc.pixels == before
@@ -0,0 +1,274 @@
+import array
+import random
+import re
+
+import pytest
+
+
+class FakeImage:
+    """A PhotoImage stand-in that really stores pixels, for put and zoomed copy."""
+
+    images = {}
+
+    def __init__(self, width, height):
+        self.name = f"image{len(FakeImage.images)}"
+        self.width = width
+        self.height = height
+        self.pixels = {}
+        self.tk = self
+        FakeImage.images[self.name] = self
+
+    def __str__(self):
+        return self.name
+
+    def put(self, data, to):
+        x0, y0 = to
+        for dy, row in enumerate(re.findall(r"\{([^}]*)\}", data)):
+            for dx, color in enumerate(row.split()):
+                assert x0 + dx < self.width and y0 + dy < self.height
+                self.pixels[(x0 + dx, y0 + dy)] = color
+
+    def call(self, dest, command, source, *options):
+        assert command == "copy"
+        dest, source = FakeImage.images[str(dest)], FakeImage.images[str(source)]
+        _, fx0, fy0, fx1, fy1, _, to_x, to_y, _, zoom, _ = options
+        for y in range(fy0, fy1):
+            for x in range(fx0, fx1):
+                color = source.pixels[(x, y)]
+                for dy in range(zoom):
+                    for dx in range(zoom):
+                        px = to_x + (x - fx0) * zoom + dx
+                        py = to_y + (y - fy0) * zoom + dy
+                        assert px < dest.width and py < dest.height
+                        dest.pixels[(px, py)] = color
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.items = {}
+        self.next_id = 0
+        self.lines_created = 0
+
+    def _add(self, item):
+        self.next_id += 1
+        self.items[self.next_id] = item
+        return self.next_id
+
+    def create_image(self, x, y, anchor, image, tags):
+        return self._add({"x": x, "y": y, "image": image, "tags": tags})
+
+    def create_line(self, x0, y0, x1, y1, fill, tags, state):
+        self.lines_created += 1
+        return self._add({"line": [x0, y0, x1, y1], "tags": tags, "state": state})
+
+    def coords(self, item, x, y):
+        self.items[item]["x"], self.items[item]["y"] = x, y
+
+    def move(self, tag, dx, dy):
+        for item in self.tagged(tag):
+            item["line"] = [v + (dx, dy)[i % 2] for i, v in enumerate(item["line"])]
+
+    def delete(self, target):
+        if isinstance(target, int):
+            del self.items[target]
+        else:
+            for key in [k for k, v in self.items.items() if v["tags"] == target]:
+                del self.items[key]
+
+    def tag_raise(self, tag):
+        # Items are stacked in dict order, last on top
+        for key in [k for k, v in self.items.items() if v["tags"] == tag]:
+            self.items[key] = self.items.pop(key)
+
+    def itemconfigure(self, tag, state):
+        for item in self.tagged(tag):
+            item["state"] = state
+
+    def tagged(self, tag):
+        return [item for item in self.items.values() if item["tags"] == tag]
+
+    def grid_on_top(self, grid_tag):
+        """True if every grid line is stacked above every tile image."""
+        tags = [item["tags"] for item in self.items.values()]
+        return "tile" not in tags[tags.index(grid_tag) :] if grid_tag in tags else True
+
+    def color_at(self, sx, sy):
+        for item in reversed(list(self.items.values())):
+            image = item.get("image")
+            if image is None:
+                continue
+            x, y = sx - item["x"], sy - item["y"]
+            if 0 <= x < image.width and 0 <= y < image.height:
+                return image.pixels.get((x, y))
+        return None
+
+
+def make_document(studio, size):
+    doc = studio.PixelDocument(size, size)
+    colors = [doc.color_index(c) for c in ("#FF0000", "#00FF00", "#0000FF")]
+    doc.pixels = array.array(
+        "H", (random.choice([0] + colors) for _ in range(size * size))
+    )
+    return doc
+
+
+def expected_color(doc, viewport, sx, sy):
+    """The cell a tile samples for canvas pixel (sx, sy), or None off-document."""
+    cx, cy = viewport.screen_to_cell(sx, sy)
+    if not doc.in_bounds(cx, cy):
+        return None
+    # Zoomed out, each tile shows every subsample-th cell from its origin
+    cells, step = viewport.tile_cells, viewport.subsample
+    return doc.get_color(cx - cx % cells % step, cy - cy % cells % step)
+
+
+def assert_screen_matches(doc, viewport, canvas, samples=150):
+    for _ in range(samples):
+        sx = random.randrange(viewport.screen_width)
+        sy = random.randrange(viewport.screen_height)
+        assert canvas.color_at(sx, sy) == expected_color(doc, viewport, sx, sy), (
+            sx, sy, viewport.zoom, viewport.subsample,
+        )
+
+
+@pytest.fixture
+def fake_tk(studio, monkeypatch):
+    FakeImage.images.clear()
+    monkeypatch.setattr(studio.tk, "PhotoImage", FakeImage)
+
+
+@pytest.mark.parametrize("size", [30, 700])
+def test_tiles_match_document_through_pan_zoom_and_edits(studio, fake_tk, size):
+    random.seed(size)
+    doc = make_document(studio, size)
+    viewport = studio.Viewport(size, size, 160, 160)
+    canvas = FakeCanvas()
+    renderer = studio.RasterRenderer(canvas, doc, viewport)
+    renderer.render()
+    assert_screen_matches(doc, viewport, canvas)
+
+    for step in range(10):
+        viewport.zoom_at(random.randrange(160), random.randrange(160), step < 6)
+        viewport.pan(random.randrange(-120, 120), random.randrange(-120, 120))
+        renderer.render()
+        assert_screen_matches(doc, viewport, canvas)
+
+        for _ in range(15):
+            x, y = random.randrange(size), random.randrange(size)
+            doc.pixels[y * size + x] = random.randrange(len(doc.palette))
+            renderer.mark_dirty(x, y)
+        renderer.flush()
+        assert_screen_matches(doc, viewport, canvas)
+
+
+def test_edits_drop_stale_tiles_of_other_levels(studio, fake_tk):
+    doc = make_document(studio, 200)
+    viewport = studio.Viewport(200, 200, 300, 300)
+    renderer = studio.RasterRenderer(FakeCanvas(), doc, viewport)
+    renderer.render()
+    fitted = set(renderer.tiles)
+    viewport.zoom_at(0, 0, True)
+    renderer.render()
+
+    renderer.mark_dirty(0, 0)
+    renderer.flush()
+
+    assert not fitted & set(renderer.tiles)
+    assert all(key[:2] == (viewport.zoom, 1) for key in renderer.tiles)
+
+
+def test_tile_cache_is_bounded(studio, fake_tk, monkeypatch):
+    monkeypatch.setattr(studio, "TILE_CACHE_SIZE", 8)
+    doc = make_document(studio, 300)
+    viewport = studio.Viewport(300, 300, 100, 100)
+    for _ in range(4):
+        viewport.zoom_at(0, 0, True)
+    renderer = studio.RasterRenderer(FakeCanvas(), doc, viewport)
+    for _ in range(30):
+        viewport.pan(37, 23)
+        renderer.render()
+        assert len(renderer.tiles) <= max(8, len(renderer.tile_items))
+
+
+def test_pan_moves_grid_lines_instead_of_rebuilding(studio, fake_tk):
+    doc = make_document(studio, 256)
+    viewport = studio.Viewport(256, 256, 300, 300)
+    for _ in range(3):
+        viewport.zoom_at(0, 0, True)  # 1 -> 8 px per cell
+    canvas = FakeCanvas()
+    renderer = studio.RasterRenderer(canvas, doc, viewport)
+    renderer.render()
+    created = canvas.lines_created
+    first_line = canvas.tagged(renderer.grid_tag)[0]["line"][:]
+
+    viewport.pan(3, 2)  # Less than a cell, so the same cells stay visible
+    renderer.render()
+
+    assert canvas.lines_created == created
+    assert canvas.tagged(renderer.grid_tag)[0]["line"] == [
+        first_line[0] - 3, first_line[1] - 2, first_line[2] - 3, first_line[3] - 2
+    ]
+
+    assert canvas.grid_on_top(renderer.grid_tag)
+
+    viewport.pan(40, 0)  # Within the one-tile margin drawn around the view
+    renderer.render()
+    assert canvas.lines_created == created
+    assert canvas.grid_on_top(renderer.grid_tag)
+
+    viewport.pan(200, 0)  # Exposes new tiles, still inside the drawn margin
+    tiles_before = set(renderer.tile_items)
+    renderer.render()
+    assert canvas.lines_created == created
+    assert set(renderer.tile_items) - tiles_before
+    assert canvas.grid_on_top(renderer.grid_tag)
+
+    viewport.pan(300, 0)  # Past the margin
+    renderer.render()
+    assert canvas.lines_created > created
+
+
+def test_fit_fills_the_canvas(studio):
+    viewport = studio.Viewport(30, 30, 600, 600)
+    assert (viewport.zoom, viewport.subsample) == (20, 1)
+    assert [level for level in viewport.levels if level[1] == 1] == [
+        (1, 1), (2, 1), (4, 1), (8, 1), (16, 1), (20, 1), (32, 1), (64, 1)
+    ]
+    assert studio.Viewport(4096, 4096, 600, 600).subsample == 8
+    assert studio.Viewport(2000, 2000, 600, 600).zoom == 1
+
+
+def test_zoom_is_clamped_and_returns_to_fit(studio):
+    viewport = studio.Viewport(30, 30, 600, 600)
+    fitted = (viewport.zoom, viewport.subsample)
+
+    viewport.zoom_at(300, 300, True)
+    assert viewport.zoom == 32
+    viewport.zoom_at(300, 300, False)
+    assert (viewport.zoom, viewport.subsample) == fitted
+    viewport.zoom_at(300, 300, False)
+    assert viewport.zoom == 16
+
+    for _ in range(10):
+        viewport.zoom_at(300, 300, True)
+        assert viewport.zoom <= studio.MAX_ZOOM
+    assert viewport.zoom == studio.MAX_ZOOM
+    assert viewport.zoom_at(300, 300, True) is False
+
+    while (viewport.zoom, viewport.subsample) != fitted:
+        assert viewport.zoom_at(300, 300, False)
+
+    for _ in range(10):
+        viewport.zoom_at(300, 300, False)
+    assert viewport.subsample == studio.MAX_SUBSAMPLE
+
+
+def test_zoom_keeps_cell_under_cursor(studio):
+    viewport = studio.Viewport(512, 512, 300, 300)
+    viewport.zoom_at(0, 0, True)
+    viewport.zoom_at(0, 0, True)
+    viewport.pan(200, 150)
+    cell = viewport.screen_to_cell(120, 80)
+
+    viewport.zoom_at(120, 80, True)
+    assert viewport.screen_to_cell(120, 80) == cell